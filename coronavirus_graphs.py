@@ -12,10 +12,18 @@
 
 # LOAD PACKAGES
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm, Normalize
+from matplotlib.cm import ScalarMappable
+from matplotlib.figure import Figure
 import numpy as np
+import glob
+import hashlib
 import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 import coronavirus_statistics as cs 
 import cartopy.crs as ccrs
+import cartopy.io.shapereader as shpreader
 
 
 
@@ -82,28 +90,28 @@ def regions_piechart(region, show = False):
 
 
 
-def countries_barchart(countries = None, show = False):
+def countries_barchart(countries = None, show = False, page_size = None, sort_by = 'deaths_per_million', workers = None):
     """
     This function receives a list of countries (optional) and draws two barcharts:
     one showing the number of cases per 1 million of citizens, and the other showing
     the number of deaths per 1 million. The barcharts are saved in the ./graphs folder
     with unique names. If no countries are provided, it considers all countries in the data.
+    If page_size is given, the countries are split into pages of page_size countries, sorted
+    by the metric sort_by, and the pages are drawn in parallel by countries_barchart_pages().
     """
-    # Load data. Variables are in the following order [Country, Cases/Population, Deaths/Population, Population]
-    data = cs.country_data()
+    if page_size is not None:
+        return countries_barchart_pages(page_size, sort_by, countries, workers, show)
 
-    # Filter data based on the list of countries (if provided)
-    if countries is not None:
-        data_filtered = data[np.isin(data[:, 0], countries)]
-    else:
-        data_filtered = data
+    # Load data for the list of countries (if provided), selected through the name index.
+    # Variables are in the following order [Country, Cases/Population, Deaths/Population, Population]
+    data = cs.country_data(countries)
 
     # Extract columns names 
-    country_names = data_filtered[:, 0]
+    country_names = data[:, 0]
     
     # Calculate cases and deaths per 1 million citizens
-    cases_per_million = data_filtered[:, 1].astype(float) * 1_000_000
-    deaths_per_million = data_filtered[:, 2].astype(float) * 1_000_000
+    cases_per_million = data[:, 1].astype(float) * 1_000_000
+    deaths_per_million = data[:, 2].astype(float) * 1_000_000
 
     # Create subplots for cases per 1 million citizens and deaths per 1 million citizens
     fig, axs = plt.subplots(2, 1, figsize=(12, 12)) # 2 rows, 1 column 
@@ -153,6 +161,219 @@ def countries_barchart(countries = None, show = False):
 
 
 
+def barchart_pages(page_size, sort_by = 'deaths_per_million', countries = None):
+    """
+    This function splits the countries (all of them, or only the given list) into pages of
+    page_size countries, sorted by decreasing value of the metric sort_by (see cs.METRICS).
+    It returns a list of pages. Each page is a tuple (country names, cases per 1 million,
+    deaths per 1 million, values of sort_by). The split only depends on the data, so any page
+    can be redrawn alone.
+    """
+    if isinstance(page_size, bool) or not isinstance(page_size, (int, np.integer)) or page_size < 1:
+        raise ValueError(f'page_size must be an integer of at least 1, got {page_size!r}')
+
+    # Load data as typed columns
+    table = cs.read_table()
+
+    # Select the rows of the requested countries (if provided)
+    if countries is not None:
+        rows = table.rows(countries)
+    else:
+        rows = np.arange(len(table))
+    if len(rows) == 0:
+        raise ValueError(f'None of the countries {countries!r} is in the data')
+
+    # Sort by decreasing metric. A stable sort keeps ties in the order of the csv file
+    metric = cs.country_metric(sort_by, table)[rows]
+    order = np.argsort(-metric, kind='stable')
+    rows = rows[order]
+    metric = metric[order]
+
+    # Calculate cases and deaths per 1 million citizens, in the sorted order
+    country_names = table.names(rows)
+    cases_per_million = cs.country_metric('cases_per_million', table)[rows]
+    deaths_per_million = cs.country_metric('deaths_per_million', table)[rows]
+
+    # Cut the sorted arrays into consecutive slices of page_size countries
+    pages = []
+    for start in range(0, len(rows), page_size):
+        end = start + page_size
+        pages.append((country_names[start:end], cases_per_million[start:end], deaths_per_million[start:end],
+                      metric[start:end]))
+
+    return pages
+
+
+
+def _barchart_stem(sort_by, countries):
+    """
+    Returns the start of the filenames of the paginated bar charts. A list of countries gets its
+    own tag, so that a filtered run does not overwrite the pages of the run over all countries.
+    """
+    if countries is None:
+        return f'countries_barchart_{sort_by}'
+    if isinstance(countries, str):
+        countries = [countries]
+    tag = hashlib.sha1('\n'.join(sorted(set(countries))).encode('utf-8')).hexdigest()[:8]
+    return f'countries_barchart_{sort_by}_selection_{tag}'
+
+
+
+def _show_image(filepath):
+    """
+    Displays a saved image on the screen.
+    """
+    img = plt.imread(filepath)
+    plt.imshow(img)
+    plt.axis('off')
+    plt.show()
+    plt.clf()
+
+
+
+def _draw_barchart_page(filepath, title, country_names, cases_per_million, deaths_per_million):
+    """
+    Draws the cases and deaths per 1 million bar charts of one page and saves them in filepath.
+    It builds a Figure directly instead of going through pyplot, so it can safely run in a worker process.
+    """
+    fig = Figure(figsize=(12, 8))
+    axs = fig.subplots(2, 1) # 2 rows, 1 column 
+    fig.subplots_adjust(hspace=0.6, bottom=0.15)
+    fig.suptitle(title)
+
+    # Bar chart for cases per 1 million citizens
+    axs[0].bar(range(len(country_names)), cases_per_million)
+    axs[0].set_xticks(range(len(country_names)))
+    axs[0].set_xticklabels(country_names, rotation=60, ha='right')
+    axs[0].set_ylabel('Cases per 1 million')
+    axs[0].set_title('COVID-19 Cases per 1 Million of Population in Countries')
+
+    # Bar chart for deaths per 1 million citizens
+    axs[1].bar(range(len(country_names)), deaths_per_million)
+    axs[1].set_xticks(range(len(country_names)))
+    axs[1].set_xticklabels(country_names, rotation=60, ha='right')
+    axs[1].set_ylabel('Deaths per 1 million')
+    axs[1].set_title('COVID-19 Deaths per 1 Million of Population in Countries')
+
+    fig.savefig(filepath)
+    return filepath
+
+
+
+def _draw_barchart_index(filepath, pages, sort_by):
+    """
+    Draws the index image of a paginated bar chart: for each page, the range of sort_by values
+    it covers, from a marker at its lowest value to a marker at its highest, labelled with the
+    page number and its first and last countries. The image is saved in filepath.
+    """
+    fig = Figure(figsize=(10, 0.4 * len(pages) + 1.5))
+    ax = fig.subplots()
+
+    labels = [f'Page {number}: {page[0][0]} - {page[0][-1]}' for number, page in enumerate(pages, start=1)]
+    positions = np.arange(len(pages))
+
+    # Each page spans from its lowest to its highest value of the sort metric.
+    # The markers keep a page of one country (or of equal values) visible
+    lowest = np.array([np.min(page[3]) for page in pages])
+    highest = np.array([np.max(page[3]) for page in pages])
+    ax.hlines(positions, lowest, highest, linewidth=4)
+    ax.plot(lowest, positions, '|', markersize=14, markeredgewidth=2, color='tab:blue')
+    ax.plot(highest, positions, '|', markersize=14, markeredgewidth=2, color='tab:blue')
+    ax.set_yticks(positions)
+    ax.set_yticklabels(labels)
+    ax.invert_yaxis() # page 1 at the top
+
+    # Counts span several orders of magnitude: use a logarithmic scale for them
+    if sort_by in ('cases', 'deaths', 'population') and lowest.size and lowest.min() > 0:
+        ax.set_xscale('log')
+    ax.set_xlabel(sort_by.replace('_', ' ').capitalize())
+    ax.set_title(f'Index of the pages, countries sorted by {sort_by}')
+    fig.tight_layout()
+
+    fig.savefig(filepath)
+    return filepath
+
+
+
+def countries_barchart_pages(page_size = 25, sort_by = 'deaths_per_million', countries = None, workers = None, show = False):
+    """
+    This function splits the countries into pages of page_size countries sorted by the metric
+    sort_by, and draws the cases and deaths per 1 million bar charts of every page, plus an
+    index image, concurrently in up to workers processes (by default, one per core).
+    The images are saved in the ./graphs folder and their filepaths are returned.
+    Optionally, the index image is displayed.
+    """
+    pages = barchart_pages(page_size, sort_by, countries)
+
+    # Get the path of the working directory
+    script_path = os.getcwd()
+
+    # Create the graphs folder if it doesn't exist
+    graphs_folder = os.path.join(script_path, 'graphs')
+    if not os.path.exists(graphs_folder):
+        os.makedirs(graphs_folder)
+
+    # Remove the pages of a previous run with more pages
+    stem = _barchart_stem(sort_by, countries)
+    for filepath in glob.glob(os.path.join(graphs_folder, f'{stem}_page_*.png')):
+        os.remove(filepath)
+
+    # Submit the index and every page to the pool: each worker only receives the arrays of its page
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        index_path = os.path.join(graphs_folder, f'{stem}_index.png')
+        futures = [executor.submit(_draw_barchart_index, index_path, pages, sort_by)]
+        for number, page in enumerate(pages, start=1):
+            filename = f'{stem}_page_{number}.png'
+            title = f'Page {number} of {len(pages)}, countries sorted by {sort_by}'
+            futures.append(executor.submit(_draw_barchart_page, os.path.join(graphs_folder, filename), title, *page[:3]))
+        filepaths = [future.result() for future in futures]
+
+    # Return the filepaths of the saved graphs
+    for filepath in filepaths:
+        print(f'{os.path.basename(filepath)} is saved in {filepath}')
+
+    # Optionally display the index
+    if show:
+        _show_image(index_path)
+
+    return filepaths
+
+
+
+def barchart_page(page, page_size = 25, sort_by = 'deaths_per_million', countries = None, show = False):
+    """
+    This function redraws only the given page (numbered from 1) of the paginated bar charts
+    drawn by countries_barchart_pages() with the same page_size, sort_by and countries.
+    """
+    pages = barchart_pages(page_size, sort_by, countries)
+    if not 1 <= page <= len(pages):
+        raise ValueError(f'Page {page} does not exist, there are {len(pages)} pages')
+
+    # Get the path of the working directory
+    script_path = os.getcwd()
+
+    # Create the graphs folder if it doesn't exist
+    graphs_folder = os.path.join(script_path, 'graphs')
+    if not os.path.exists(graphs_folder):
+        os.makedirs(graphs_folder)
+
+    # Save the page in the graphs folder
+    filename = f'{_barchart_stem(sort_by, countries)}_page_{page}.png'
+    filepath = os.path.join(graphs_folder, filename)
+    title = f'Page {page} of {len(pages)}, countries sorted by {sort_by}'
+    _draw_barchart_page(filepath, title, *pages[page - 1][:3])
+
+    # Return the filepath of the saved graph
+    print(f'{filename} is saved in {filepath}')
+
+    # Optionally display the page
+    if show:
+        _show_image(filepath)
+
+    return filepath
+
+
+
 def highest_mortality(k, n = 0, show = False):
     """
     This function takes two integers, n and k. It extracts the top k countries with the
@@ -203,12 +424,23 @@ def highest_mortality(k, n = 0, show = False):
 
 
 
-def map(k, show = False):
+# Kinds of map drawn by map()
+MAP_MODES = ('circles', 'choropleth')
+
+
+
+def map(k, show = False, mode = 'circles', metric = 'deaths_per_million'):
     """
     This function takes an integer k as an argument and draws a map. On this map, it puts k circles
     with centers in the capital of countries with the highest number of deaths normalized by the size
     of the population. The size of the circle depends on the mortality rate.
+    With mode = 'choropleth', it instead shades every country by the given metric, see choropleth_map().
     """
+    if mode not in MAP_MODES:
+        raise ValueError(f'Unknown map mode {mode!r}, expected one of {MAP_MODES}')
+    if mode == 'choropleth':
+        return choropleth_map(metric, show)
+
     # Load data. Variables are in the following order [Country, Deaths/Population, Latitude, Longitude]
     data = cs.top_country_data(k = k)
 
@@ -257,6 +489,158 @@ def map(k, show = False):
 
 
 
+# Country boundaries bundled with the tool: Natural Earth 1:110m admin 0 countries (public domain),
+# relative to the working directory like coronavirus_data.csv
+COUNTRY_SHAPES = os.path.join('data', 'naturalearth_lowres', 'naturalearth_lowres.shp')
+
+# Simplified geometries already loaded in this process, by resolution
+_geometry_cache = {}
+
+
+
+def country_geometries(resolution):
+    """
+    This function returns a dictionary with the ISO3 code of each country mapped to its boundary,
+    simplified so that no detail is smaller than one pixel of a world map resolution pixels wide,
+    and a dictionary with the name of each country of worldcities.csv mapped to its ISO3 code.
+    The result is computed once per resolution and cached in the ./cache folder, so later calls
+    skip the parsing of the shapefile and the simplification of the polygons.
+    """
+    if resolution in _geometry_cache:
+        return _geometry_cache[resolution]
+
+    # Get the path of the working directory
+    script_path = os.getcwd()
+    shapes_path = os.path.join(script_path, COUNTRY_SHAPES)
+    cities_path = os.path.join(script_path, 'worldcities.csv')
+
+    # The cache is valid as long as the source files are unchanged: every file of the shapefile
+    # (.shp, .shx, .dbf with the ISO3 codes, ...) and worldcities.csv
+    source_paths = sorted(glob.glob(os.path.splitext(shapes_path)[0] + '.*')) + [cities_path]
+    sources = [(os.path.basename(path), os.path.getmtime(path), os.path.getsize(path)) for path in source_paths]
+
+    # Create the cache folder if it doesn't exist
+    cache_folder = os.path.join(script_path, 'cache')
+    if not os.path.exists(cache_folder):
+        os.makedirs(cache_folder)
+    cache_path = os.path.join(cache_folder, f'country_geometries_{resolution}px.pickle')
+
+    # Reuse the cached geometries if they were built from the same sources
+    # A cache file that cannot be read (truncated, or written by another version of shapely) is rebuilt
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as file:
+                cached = pickle.load(file)
+        except Exception:
+            cached = {'sources': None}
+        if cached['sources'] == sources:
+            _geometry_cache[resolution] = (cached['geometries'], cached['iso3'])
+            return _geometry_cache[resolution]
+
+    # One pixel of a world map in the Plate Carree projection, in degrees
+    tolerance = 360 / resolution
+
+    # Read and simplify the country boundaries
+    geometries = {}
+    for record in shpreader.Reader(shapes_path).records():
+        code = record.attributes['iso_a3']
+        if code != '-99':
+            geometries[code] = record.geometry.simplify(tolerance, preserve_topology=True)
+
+    # Map country names to ISO3 codes with worldcities.csv, the source of the names of coronavirus_data.csv
+    iso3 = {}
+    with open(cities_path, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+        header = lines[0].strip().split(',')
+        country_index = header.index('country')
+        iso3_index = header.index('iso3')
+        for line in lines[1:]:
+            values = line.strip().split(',')
+            iso3.setdefault(values[country_index], values[iso3_index])
+
+    # Save the result in the cache folder
+    with open(cache_path, 'wb') as file:
+        pickle.dump({'sources': sources, 'geometries': geometries, 'iso3': iso3}, file)
+
+    _geometry_cache[resolution] = (geometries, iso3)
+    return _geometry_cache[resolution]
+
+
+
+def choropleth_map(metric = 'deaths_per_million', show = False, figsize = (12, 6), dpi = 100):
+    """
+    This function draws a world map where every country is shaded according to the given metric
+    (see cs.METRICS). Countries too small to have a boundary at this scale are drawn as a dot on
+    their capital. The boundaries come from country_geometries(), simplified for the size of the figure.
+    """
+    # Load data as typed columns and compute the metric for every country
+    table = cs.read_table()
+    values = cs.country_metric(metric, table)
+
+    # Boundaries simplified for the width of the map in pixels
+    geometries, iso3 = country_geometries(int(figsize[0] * dpi))
+
+    # Counts span several orders of magnitude: use a logarithmic color scale for them,
+    # unless no country has a positive count
+    cmap = plt.get_cmap('Reds')
+    if metric in ('cases', 'deaths', 'population') and values.max() > 0:
+        norm = LogNorm(vmin=max(values[values > 0].min(), 1), vmax=values.max())
+    else:
+        norm = Normalize(vmin=values.min(), vmax=values.max())
+
+    # Set up the plot axes
+    fig = plt.figure(figsize=figsize, dpi=dpi)
+    ax = plt.axes(projection=ccrs.PlateCarree())
+    ax.set_global()
+
+    # Shade the countries of the data, and keep the others in grey
+    drawn = set()
+    missing = []
+    for row in range(len(table)):
+        code = iso3.get(table.name(row))
+        if code in geometries:
+            color = cmap(norm(max(values[row], norm.vmin)))
+            ax.add_geometries([geometries[code]], ccrs.PlateCarree(), facecolor=color, edgecolor='white', linewidth=0.3)
+            drawn.add(code)
+        else:
+            missing.append(row)
+    others = [geometry for code, geometry in geometries.items() if code not in drawn]
+    ax.add_geometries(others, ccrs.PlateCarree(), facecolor='lightgrey', edgecolor='white', linewidth=0.3)
+
+    # Countries without a boundary at this scale: a dot on the capital
+    ax.scatter(table.longitude[missing], table.latitude[missing], c=values[missing], cmap=cmap, norm=norm,
+               s=12, edgecolors='black', linewidths=0.3, transform=ccrs.PlateCarree())
+
+    # Add the color scale and the title
+    fig.colorbar(ScalarMappable(norm=norm, cmap=cmap), ax=ax, orientation='horizontal', shrink=0.6, pad=0.05,
+                 label=metric.replace('_', ' '))
+    plt.title(f'COVID-19 {metric.replace("_", " ")} by country')
+
+    # Get the path of the working directory
+    script_path = os.getcwd()
+
+    # Create the graphs folder if it doesn't exist
+    graphs_folder = os.path.join(script_path, 'graphs')
+    if not os.path.exists(graphs_folder):
+        os.makedirs(graphs_folder)
+
+    # Save the plot in the graphs folder
+    filename = f'{metric}_choropleth_map.png'
+    filepath = os.path.join(graphs_folder, filename)
+    plt.savefig(filepath)
+
+    # Optionally show the map
+    if show:
+        plt.show()
+
+    # Close the figure to release memory
+    plt.close(fig)
+
+    # Return the filepaths of the saved graphs
+    print(f'{filename} is saved in {filepath}')
+
+
+
 def main():
     user_input = input("Do you want to study the coronavirus data? (Yes/No): ")
     if user_input.lower() != "yes":
@@ -265,7 +649,7 @@ def main():
     
     while True: # starts an infinite loop that will keep running until a break statement is encountered
         # Ask user about the type of graph they want to plot
-        graph_type = input("Which graph would you like to draw? (regions_piechart/countries_barchart/highest_mortality_barchart/highest_mortality_map): ")
+        graph_type = input("Which graph would you like to draw? (regions_piechart/countries_barchart/highest_mortality_barchart/highest_mortality_map/choropleth_map): ")
         print(f"You have choosen the option: '{graph_type}'")
 
         # Graph 1
@@ -305,11 +689,25 @@ def main():
                 else: 
                     countries_barchart(countries_input)
             elif all_countries.lower() == "yes":
-                show = input("Do you want the graph to be shown on the screen? (Yes/No): ")
-                if show.lower() == "yes":
-                    countries_barchart(show = True)
-                else: 
-                    countries_barchart()
+                paginate = input("Do you want the countries split into pages sorted by deaths per million? (Yes/No): ")
+                if paginate.lower() == "yes":
+                    while True:
+                        page_size = input("Please enter the number of countries per page: ")
+                        if page_size.isdigit() and int(page_size) >= 1:
+                            break
+                        else:
+                            print("Invalid number of countries. Please enter a whole number of at least 1.")
+                    show = input("Do you want the index of the pages to be shown on the screen? (Yes/No): ")
+                    if show.lower() == "yes":
+                        countries_barchart(page_size = int(page_size), show = True)
+                    else:
+                        countries_barchart(page_size = int(page_size))
+                else:
+                    show = input("Do you want the graph to be shown on the screen? (Yes/No): ")
+                    if show.lower() == "yes":
+                        countries_barchart(show = True)
+                    else: 
+                        countries_barchart()
 
     
         # Graph 3
@@ -338,6 +736,20 @@ def main():
                 map(k, True)
             else:
                 map(k)
+
+        # Graph 5
+        elif graph_type.lower() == "choropleth_map":
+            while True:
+                metric = input(f"Please choose among this list {list(cs.METRICS)}, the metric used to shade the countries: ")
+                if metric in cs.METRICS:
+                    break
+                else:
+                    print("Invalid metric. Please try again.")
+            show = input("Do you want the graph to be shown on the screen? (Yes/No): ")
+            if show.lower() == "yes":
+                choropleth_map(metric, show = True)
+            else:
+                choropleth_map(metric)
         
         else:
             print("Invalid graph type of graph. Please try again.")
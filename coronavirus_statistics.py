@@ -12,6 +12,16 @@
 
 # LOAD PACKAGES
 import numpy as np
+import mmap
+import os
+import sys
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+try:
+    import _posixshmem
+except ImportError:
+    # Windows
+    _posixshmem = None
 
 
 # DEFINE FUNCTIONS 
@@ -32,44 +42,432 @@ def read_data():
 
     # Convert the data list into a NumPy array
     data_array = np.array(data)
-    return data_array 
+    return data_array
 
 
-def region_data():
+
+class CovidTable:
     """
-    This function takes a 2D numpy array containing country-level data and returns a 2D numpy array
-    where each line contains: a region, number of cases, number of deaths, and population for that region.
+    Compact, typed, column-oriented view of coronavirus_data.csv.
+    Country names live in a single UTF-8 string pool addressed by offsets, regions are
+    stored as small integer codes into the sorted list of region labels, counts are int64
+    and capital coordinates are float32. A name-to-row dictionary gives fast lookups.
     """
 
-    # Load data. 
-    # Variables are ['country', 'cases', 'deaths', 'region', 'population', 'latitude', 'longitude']
-    data = read_data()
+    def __init__(self, name_pool, name_offsets, region_codes, regions,
+                 cases, deaths, population, latitude, longitude):
+        # String pool: the name of row i is name_pool[name_offsets[i]:name_offsets[i + 1]]
+        self.name_pool = name_pool
+        self.name_offsets = name_offsets
+
+        # Categorical region column: region_codes[i] indexes into the tuple of region labels
+        self.region_codes = region_codes
+        self.regions = tuple(regions)
+
+        # Numeric columns
+        self.cases = cases
+        self.deaths = deaths
+        self.population = population
+        self.latitude = latitude
+        self.longitude = longitude
+
+        # The name index is built lazily, on the first lookup
+        self._index = None
+
+    def __len__(self):
+        return len(self.cases)
+
+    def name(self, row):
+        """
+        Returns the country name stored in the given row.
+        """
+        start, end = self.name_offsets[row], self.name_offsets[row + 1]
+        return self.name_pool[start:end].tobytes().decode('utf-8')
+
+    def names(self, rows = None):
+        """
+        Returns a NumPy array of country names, for all rows or only for the given rows.
+        """
+        if rows is None:
+            rows = range(len(self))
+        # dtype=str keeps an empty selection a string array
+        return np.array([self.name(row) for row in rows], dtype=str)
+
+    def region_names(self, rows = None):
+        """
+        Returns a NumPy array of region labels, for all rows or only for the given rows.
+        """
+        codes = self.region_codes if rows is None else self.region_codes[rows]
+        return np.array(self.regions)[codes]
+
+    def index(self):
+        """
+        Returns the dictionary mapping each country name to its row number.
+        """
+        if self._index is None:
+            self._index = {self.name(row): row for row in range(len(self))}
+        return self._index
+
+    def rows(self, countries):
+        """
+        Returns the sorted row numbers of the given countries. Countries that are not
+        in the data are ignored, like np.isin(data[:, 0], countries) does.
+        """
+        # A single country name is a list of one country, not a sequence of characters
+        if isinstance(countries, str):
+            countries = [countries]
+
+        index = self.index()
+        # One dictionary lookup per requested country instead of a scan of the whole column
+        rows = [index[country] for country in countries if country in index]
+        # np.unique removes duplicates and keeps the rows in the order of the csv file
+        return np.unique(np.array(rows, dtype=np.intp))
+
+
+
+def read_table(path = 'coronavirus_data.csv'):
+    """
+    Reads the coronavirus_data.csv file and returns it as a CovidTable, with typed columns
+    instead of the fixed-width strings returned by read_data().
+    """
+    names = []
+    region_labels = []
+    cases = []
+    deaths = []
+    population = []
+    latitude = []
+    longitude = []
+    with open(path, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+
+        # Iterate over the lines (excluding the header)
+        # Variables are ['country', 'cases', 'deaths', 'region', 'population', 'latitude', 'longitude']
+        for line in lines[1:]:
+            row = [value.strip() for value in line.split(',')]
+            names.append(row[0])
+            cases.append(int(row[1]))
+            deaths.append(int(row[2]))
+            region_labels.append(row[3])
+            population.append(int(row[4]))
+            latitude.append(float(row[5]))
+            longitude.append(float(row[6]))
+
+    # Build the string pool: all names encoded back to back, with the start offset of each name
+    encoded = [name.encode('utf-8') for name in names]
+    name_offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+    name_offsets[1:] = np.cumsum([len(name) for name in encoded])
+    name_pool = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    # Encode regions as categorical codes: return_inverse gives the code of each row
+    regions, region_codes = np.unique(np.array(region_labels), return_inverse=True)
+
+    return CovidTable(name_pool, name_offsets, region_codes.astype(np.uint8), regions.tolist(),
+                      np.array(cases, dtype=np.int64), np.array(deaths, dtype=np.int64),
+                      np.array(population, dtype=np.int64), np.array(latitude, dtype=np.float32),
+                      np.array(longitude, dtype=np.float32))
+
+
+
+# Per-country metrics that can be used to sort or shade countries
+METRICS = ('cases', 'deaths', 'population', 'cases_per_million', 'deaths_per_million')
 
-    # Replace "Australia/Oceania" with "Australia-Oceania" in the region column
-    data[:, 3][data[:, 3] == 'Australia/Oceania'] = 'Australia-Oceania'
-    
-    # Get unique regions from the data
-    regions = np.unique(data[:, 3])
 
-    # Initialize empty lists to store region data
-    region_cases = []
-    region_deaths = []
-    region_population = []
 
-    # Iterate over each region
-    for region in regions:
-        # Filter data for the current region
-        region_data = data[data[:, 3] == region]
+def country_metric(metric, table = None):
+    """
+    Receives the name of a metric in METRICS and returns a float64 NumPy array with the value
+    of this metric for each row of the table (by default, the one returned by read_table()).
+    """
+    if table is None:
+        table = read_table()
+
+    if metric == 'cases':
+        return table.cases.astype(np.float64)
+    if metric == 'deaths':
+        return table.deaths.astype(np.float64)
+    if metric == 'population':
+        return table.population.astype(np.float64)
+    if metric == 'cases_per_million':
+        return table.cases / table.population * 1_000_000
+    if metric == 'deaths_per_million':
+        return table.deaths / table.population * 1_000_000
+    raise ValueError(f'Unknown metric {metric!r}, expected one of {METRICS}')
+
+
+
+# Name prefix of the shared memory segments published by publish_shared()
+SHARED_PREFIX = 'covid19_tool'
+
+# Arrays stored in a shared memory segment, in order, with their types
+SHARED_COLUMNS = [('cases', np.int64), ('deaths', np.int64), ('population', np.int64),
+                  ('latitude', np.float32), ('longitude', np.float32), ('region_codes', np.uint8),
+                  ('name_offsets', np.int32), ('name_pool', np.uint8),
+                  ('region_offsets', np.int32), ('region_pool', np.uint8)]
+
+# Segments created by this process, kept open so that they are not garbage collected
+_published = {}
+
+
+
+def _shared_layout(lengths):
+    """
+    Receives the length of each array of SHARED_COLUMNS and returns the byte offset of each
+    array in the segment, and the total size of the segment. The segment starts with a header
+    of int64 lengths and every array starts on an 8-byte boundary.
+    """
+    offsets = []
+    position = 8 * len(SHARED_COLUMNS)
+    for (column, dtype), length in zip(SHARED_COLUMNS, lengths):
+        offsets.append(position)
+        position += length * np.dtype(dtype).itemsize
+        # Round up to the next multiple of 8
+        position = (position + 7) // 8 * 8
+    return offsets, position
+
+
+
+class _ReadOnlyMapping:
+    """
+    Read-only memory mapping of a POSIX shared memory segment, with the buf attribute and
+    the close() method of a shared_memory.SharedMemory.
+    """
 
-        # Get the sum of cases, deaths, and population for the region
-        total_cases = np.sum(region_data[:, 1].astype(int))
-        total_deaths = np.sum(region_data[:, 2].astype(int))
-        total_population = np.sum(region_data[:, 4].astype(int))
+    def __init__(self, fd):
+        self._mmap = mmap.mmap(fd, os.fstat(fd).st_size, prot=mmap.PROT_READ)
+        self.buf = memoryview(self._mmap)
 
-        # Append the region data to the respective lists
-        region_cases.append(total_cases)
-        region_deaths.append(total_deaths)
-        region_population.append(total_population)
+    def close(self):
+        """
+        Unmaps the segment. Raises BufferError while NumPy views on it are still referenced.
+        """
+        self.buf.release()
+        self._mmap.close()
+
+
+
+def _untracked_segment(name, create = False, size = 0, read_only = False):
+    """
+    Opens (or creates) a shared memory segment that no resource tracker destroys, and returns an object
+    with a buf attribute and a close() method. Workers open the segments read-only; publishers open
+    the generation counter, which must outlive them. This is the only place that relies on CPython internals:
+    - from Python 3.13, SharedMemory(track=False) does it with the public API,
+    - on Windows there is no resource tracker. There, a segment disappears once its last handle
+      is closed, whatever unlink() does,
+    - on older POSIX versions, SharedMemory always registers the segment with the tracker. Readers
+      map the segment themselves with _posixshmem.shm_open: unregistering it afterwards could drop
+      the registration of a publisher sharing the same tracker. The counter is never left registered
+      by anyone, so a writer can cancel its own registration right away.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    if _posixshmem is None:
+        return shared_memory.SharedMemory(name=name, create=create, size=size)
+    if read_only and not create:
+        fd = _posixshmem.shm_open('/' + name, os.O_RDONLY, mode=0o600)
+        try:
+            return _ReadOnlyMapping(fd)
+        finally:
+            os.close(fd)
+    segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+
+def publish_shared(table = None, prefix = SHARED_PREFIX):
+    """
+    Publishes the columns and indexes of a CovidTable (by default, the one returned by read_table())
+    into a new named shared memory segment and increases the generation counter, so that workers
+    using a SharedTable swap to the new data. The segment of the previous generation is unlinked:
+    workers still attached to it keep their mapping until they swap.
+    The data segments live as long as the publishing process. The generation counter is never
+    unlinked, so a new publisher process continues the count. On Windows, segments disappear
+    once their last handle is closed: the counter only lasts while a publisher or a worker has
+    it open, and unlinking does nothing. Returns the new generation number.
+    """
+    if table is None:
+        table = read_table()
+
+    # Attach to the generation counter, or create it on the first publication
+    control_name = f'{prefix}_generation'
+    if control_name not in _published:
+        try:
+            _published[control_name] = _untracked_segment(control_name, create=True, size=8)
+            np.ndarray((1,), dtype=np.int64, buffer=_published[control_name].buf)[0] = 0
+        except FileExistsError:
+            _published[control_name] = _untracked_segment(control_name)
+    counter = np.ndarray((1,), dtype=np.int64, buffer=_published[control_name].buf)
+    previous = int(counter[0])
+    generation = previous + 1
+
+    # Region labels go into their own small string pool
+    encoded = [region.encode('utf-8') for region in table.regions]
+    region_offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+    region_offsets[1:] = np.cumsum([len(region) for region in encoded])
+    region_pool = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    arrays = {'cases': table.cases, 'deaths': table.deaths, 'population': table.population,
+              'latitude': table.latitude, 'longitude': table.longitude,
+              'region_codes': table.region_codes, 'name_offsets': table.name_offsets,
+              'name_pool': table.name_pool, 'region_offsets': region_offsets, 'region_pool': region_pool}
+    lengths = [len(arrays[column]) for column, dtype in SHARED_COLUMNS]
+    offsets, size = _shared_layout(lengths)
+
+    # Create the segment of the new generation and copy the header and the arrays into it.
+    # A segment left over by a publisher that was killed is replaced
+    try:
+        segment = shared_memory.SharedMemory(name=f'{prefix}_{generation}', create=True, size=size)
+    except FileExistsError:
+        stale = shared_memory.SharedMemory(name=f'{prefix}_{generation}')
+        stale.close()
+        stale.unlink()
+        segment = shared_memory.SharedMemory(name=f'{prefix}_{generation}', create=True, size=size)
+    np.ndarray((len(lengths),), dtype=np.int64, buffer=segment.buf)[:] = lengths
+    for (column, dtype), length, offset in zip(SHARED_COLUMNS, lengths, offsets):
+        view = np.ndarray((length,), dtype=dtype, buffer=segment.buf, offset=offset)
+        view[:] = arrays[column]
+    del view
+    _published[segment.name] = segment
+
+    # Swap: workers see the new generation only once the segment is complete
+    counter[0] = generation
+
+    # Retire the previous generation
+    old = _published.pop(f'{prefix}_{previous}', None)
+    if old is not None:
+        old.close()
+        old.unlink()
+
+    return generation
+
+
+
+def unpublish_shared(prefix = SHARED_PREFIX):
+    """
+    Unlinks the data segments published by this process under the given prefix. The generation
+    counter stays, so that the next publication gets a higher generation and attached workers swap to it.
+    """
+    control_name = f'{prefix}_generation'
+    for name in [name for name in _published if name.startswith(f'{prefix}_') and name != control_name]:
+        segment = _published.pop(name)
+        segment.close()
+        segment.unlink()
+
+
+
+class SharedTable:
+    """
+    Read-only access, from a worker process, to the CovidTable published by publish_shared().
+    The columns are NumPy views on the shared memory segment, so no data is copied per worker.
+    Every call to table() checks the generation counter and attaches to the new segment after
+    a refresh.
+    """
+
+    def __init__(self, prefix = SHARED_PREFIX):
+        self.prefix = prefix
+        self.generation = None
+        self._control = _untracked_segment(f'{prefix}_generation', read_only=True)
+        self._counter = np.ndarray((1,), dtype=np.int64, buffer=self._control.buf)
+        self._counter.setflags(write=False)
+        self._segment = None
+        self._table = None
+
+    def table(self):
+        """
+        Returns the CovidTable of the latest published generation.
+        """
+        generation = int(self._counter[0])
+        while generation != self.generation:
+            try:
+                segment = _untracked_segment(f'{self.prefix}_{generation}', read_only=True)
+            except FileNotFoundError:
+                # The segment was retired by a newer publication in the meantime: read the counter again.
+                # If there is no newer publication, the publisher is gone
+                if int(self._counter[0]) == generation:
+                    raise
+                generation = int(self._counter[0])
+                continue
+            self._release()
+            self._segment = segment
+            self._table = self._read(segment)
+            self.generation = generation
+        return self._table
+
+    def _read(self, segment):
+        """
+        Builds a CovidTable whose columns are read-only views on the segment.
+        """
+        lengths = np.ndarray((len(SHARED_COLUMNS),), dtype=np.int64, buffer=segment.buf).tolist()
+        offsets, size = _shared_layout(lengths)
+        arrays = {}
+        for (column, dtype), length, offset in zip(SHARED_COLUMNS, lengths, offsets):
+            arrays[column] = np.ndarray((length,), dtype=dtype, buffer=segment.buf, offset=offset)
+            arrays[column].setflags(write=False)
+
+        # Decode the region labels (a handful of short strings)
+        region_offsets = arrays['region_offsets']
+        region_pool = arrays['region_pool'].tobytes()
+        regions = [region_pool[region_offsets[i]:region_offsets[i + 1]].decode('utf-8')
+                   for i in range(len(region_offsets) - 1)]
+
+        return CovidTable(arrays['name_pool'], arrays['name_offsets'], arrays['region_codes'], regions,
+                          arrays['cases'], arrays['deaths'], arrays['population'],
+                          arrays['latitude'], arrays['longitude'])
+
+    def _release(self):
+        """
+        Detaches from the current segment. If views on it are still referenced elsewhere,
+        the mapping is released when they are garbage collected.
+        """
+        self._table = None
+        if self._segment is not None:
+            try:
+                self._segment.close()
+            except BufferError:
+                pass
+            self._segment = None
+
+    def close(self):
+        """
+        Detaches from the shared memory segments.
+        """
+        self._release()
+        self._counter = None
+        try:
+            self._control.close()
+        except BufferError:
+            pass
+
+
+
+
+def _region_labels(regions):
+    """
+    Returns the region labels used in the outputs of this module: "Australia/Oceania" becomes
+    "Australia-Oceania", which can be used in filenames.
+    """
+    return tuple(region.replace('Australia/Oceania', 'Australia-Oceania') for region in regions)
+
+
+
+def region_data():
+    """
+    This function takes a 2D numpy array containing country-level data and returns a 2D numpy array
+    where each line contains: a region, number of cases, number of deaths, and population for that region.
+    """
+
+    # Load data as typed columns
+    table = read_table()
+
+    # Replace "Australia/Oceania" with "Australia-Oceania" in the region labels
+    regions = np.array(_region_labels(table.regions))
+
+    # Sum cases, deaths, and population per region in one pass.
+    # The region codes are the group index: bincount adds up the weights of the rows sharing a code
+    n_regions = len(regions)
+    region_cases = np.bincount(table.region_codes, weights=table.cases, minlength=n_regions).astype(np.int64)
+    region_deaths = np.bincount(table.region_codes, weights=table.deaths, minlength=n_regions).astype(np.int64)
+    region_population = np.bincount(table.region_codes, weights=table.population, minlength=n_regions).astype(np.int64)
 
     # Stack the region data horizontally to create the region data array
     # The column_stack() function expects multiple arrays as separate arguments. 
@@ -88,19 +486,20 @@ def country_data(countries = None):
     number of deaths normalized by population, and population.
     If no countries are provided, it considers all countries in the data.
     """
-    # Load data
-    #  # Variables are ['country', 'cases', 'deaths', 'region', 'population', 'latitude', 'longitude']
-    data = read_data()
+    # Load data as typed columns
+    table = read_table()
 
-    # Filter data based on the list of countries (if provided)
+    # Select the rows of the requested countries (if provided) through the name index
     if countries is not None:
-        data = data[np.isin(data[:, 0], countries)]
+        rows = table.rows(countries)
+    else:
+        rows = np.arange(len(table))
 
     # Extract relevant columns from the data
-    country_names = data[:, 0]
-    cases = data[:, 1].astype(int)
-    deaths = data[:, 2].astype(int)
-    population = data[:, 4].astype(int)
+    country_names = table.names(rows)
+    cases = table.cases[rows]
+    deaths = table.deaths[rows]
+    population = table.population[rows]
 
     # Calculate normalized values
     cases_normalized = cases / population
@@ -122,29 +521,96 @@ def top_country_data(k, n = 0):
     at least n that have the highest number of deaths normalized by the size of the population. 
     The argument n is optional with n = 0 by default.
     """
-    # Load data
-    # Variables order is ['country', 'cases', 'deaths', 'region', 'population', 'latitude', 'longitude'] 
-    data = read_data()
+    # Load data as typed columns
+    table = read_table()
 
-    # Filter the country data based on population size
-    
-    data = data[data[:, 4].astype(int) >= n]
+    # Filter the rows based on population size
+    rows = np.flatnonzero(table.population >= n)
 
     # Normalized deaths by population
-    data[:,2] = data[:,2].astype(float)/data[:,4].astype(float) 
+    deaths_normalized = table.deaths[rows] / table.population[rows]
 
-    # Sort the filtered data based on deaths normalized by population: ascending order
-    # Indexing the data array with the sorted indices 
-    sorted_data = data[np.argsort(data[:,2].astype(float))]
+    # Sort the filtered rows based on deaths normalized by population: ascending order
+    # A stable sort keeps ties in the order of the csv file
+    order = np.argsort(deaths_normalized, kind='stable')
 
     # Select the top k countries with highest deaths normalized by population
     # Negative indexing allows you to count from the end of the array. 
-    top_countries = sorted_data[-k:] 
-
-    # Select the all the rows of the relevant columns 
-    result = top_countries[:,[0,2,5,6]]
+    top = order[-k:]
+    top_rows = rows[top]
+
+    # Select the relevant columns 
+    # Coordinates are written with 4 decimals, as in coronavirus_data.csv
+    result = np.column_stack((table.names(top_rows), deaths_normalized[top],
+                              np.char.mod('%.4f', table.latitude[top_rows]),
+                              np.char.mod('%.4f', table.longitude[top_rows])))
     
     return result
 
 
 
+# Result of scenarios(). Arrays are indexed [infection fraction, CFR multiplier, age adjustment, country or region]
+Scenarios = namedtuple('Scenarios', ['infection_fraction', 'cfr_multiplier', 'age_adjustment',
+                                     'countries', 'cases', 'deaths', 'regions', 'region_cases', 'region_deaths'])
+
+
+
+def scenarios(infection_fraction, cfr_multiplier = 1.0, age_adjustment = 1.0, table = None):
+    """
+    This function evaluates what-if scenarios for every country in one broadcast computation.
+    It receives grids of parameters:
+    - infection_fraction: fractions of the population that get infected (the attack rate),
+    - cfr_multiplier: factors applied to the case fatality rate observed in each country (deaths / cases),
+    - age_adjustment: factors applied to the case fatality rate for the age structure. Each factor is
+      either one number, or one number per region in the order of table.regions.
+    For every combination of parameters, projected cases are infection_fraction * population and
+    projected deaths are projected cases * observed CFR * cfr_multiplier * age_adjustment, with the
+    fatality rate capped at 1. The projections are summed by region with a group-by on the region codes.
+    It returns a Scenarios tuple whose cases and deaths arrays have the shape
+    (infection fractions, CFR multipliers, age adjustments, countries), and whose region_cases and
+    region_deaths arrays have the shape (infection fractions, CFR multipliers, age adjustments, regions).
+    """
+    if table is None:
+        table = read_table()
+
+    # Parameter grids as 1D (or 2D, for per-region age adjustments) float arrays
+    infection_fraction = np.atleast_1d(np.asarray(infection_fraction, dtype=np.float64))
+    cfr_multiplier = np.atleast_1d(np.asarray(cfr_multiplier, dtype=np.float64))
+    age_adjustment = np.atleast_1d(np.asarray(age_adjustment, dtype=np.float64))
+    if infection_fraction.ndim != 1:
+        raise ValueError(f'infection_fraction must be a number or a 1D grid, got {infection_fraction.ndim} dimensions')
+    if cfr_multiplier.ndim != 1:
+        raise ValueError(f'cfr_multiplier must be a number or a 1D grid, got {cfr_multiplier.ndim} dimensions')
+    if age_adjustment.ndim > 2:
+        raise ValueError(f'age_adjustment must be a number, a 1D grid, or a 2D grid with one factor per region, '
+                         f'got {age_adjustment.ndim} dimensions')
+    regions = _region_labels(table.regions)
+
+    # Age adjustment of each country, shape (age adjustments, countries)
+    if age_adjustment.ndim == 1:
+        age_factor = np.broadcast_to(age_adjustment[:, None], (len(age_adjustment), len(table)))
+    else:
+        if age_adjustment.shape[1] != len(regions):
+            raise ValueError(f'Expected one age adjustment per region {regions}, '
+                             f'got {age_adjustment.shape[1]}')
+        # Indexing by the region codes gives each country the factor of its region
+        age_factor = age_adjustment[:, table.region_codes]
+
+    # Observed case fatality rate of each country, 0 for countries without cases
+    observed_cfr = np.divide(table.deaths, table.cases, out=np.zeros(len(table)), where=table.cases > 0)
+
+    # Broadcast over the axes (infection fraction, CFR multiplier, age adjustment, country)
+    cases = infection_fraction[:, None, None, None] * table.population[None, None, None, :]
+    cfr = observed_cfr[None, None, None, :] * cfr_multiplier[None, :, None, None] * age_factor[None, None, :, :]
+    deaths = cases * np.minimum(cfr, 1.0)
+    # Repeat the cases over the CFR and age axes, as a regular array like deaths
+    cases = np.broadcast_to(cases, deaths.shape).copy()
+
+    # Group-by region: multiplying by the one-hot matrix of the region codes sums the countries of each region
+    membership = np.zeros((len(table), len(table.regions)))
+    membership[np.arange(len(table)), table.region_codes] = 1.0
+    region_cases = cases @ membership
+    region_deaths = deaths @ membership
+
+    return Scenarios(infection_fraction, cfr_multiplier, age_adjustment, table.names(), cases, deaths,
+                     regions, region_cases, region_deaths)
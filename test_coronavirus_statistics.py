@@ -0,0 +1,200 @@
+
+#############################################################################################
+
+# Tests for Part II: Analysing the data
+
+#############################################################################################
+
+
+
+# LOAD PACKAGES
+import multiprocessing as mp
+import os
+import uuid
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import coronavirus_statistics as cs
+
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'coronavirus_data.csv')
+
+
+
+# DEFINE HELPERS
+def _worker(prefix, connection):
+    """
+    Worker process: attaches to the shared table and answers each 'read' request with
+    the generation it sees and the total number of cases, until it receives 'stop'.
+    """
+    shared = cs.SharedTable(prefix)
+    while connection.recv() == 'read':
+        table = shared.table()
+        connection.send((shared.generation, int(table.cases.sum())))
+    shared.close()
+
+
+
+def _publisher(prefix, factor, connection):
+    """
+    Publisher process: publishes the table with cases multiplied by factor, sends the generation,
+    and exits once it receives 'stop'.
+    """
+    table = cs.read_table(DATA_PATH)
+    table.cases = table.cases * factor
+    connection.send(cs.publish_shared(table, prefix))
+    connection.recv()
+
+
+
+@pytest.fixture
+def prefix():
+    """
+    A unique segment prefix per test. The generation counter is never unlinked by the module,
+    so the test removes it.
+    """
+    prefix = f'covid19_test_{uuid.uuid4().hex[:8]}'
+    yield prefix
+    cs.unpublish_shared(prefix)
+    try:
+        counter = shared_memory.SharedMemory(name=f'{prefix}_generation')
+    except FileNotFoundError:
+        return
+    counter.close()
+    counter.unlink()
+
+
+
+@pytest.fixture(params=['fork', 'spawn'])
+def context(request):
+    return mp.get_context(request.param)
+
+
+
+# TESTS
+def test_worker_swaps_after_unpublish_and_republish(prefix, context):
+    table = cs.read_table(DATA_PATH)
+    total = int(table.cases.sum())
+    assert cs.publish_shared(table, prefix) == 1
+
+    parent, child = context.Pipe()
+    worker = context.Process(target=_worker, args=(prefix, child))
+    worker.start()
+    try:
+        parent.send('read')
+        assert parent.recv() == (1, total)
+
+        # Unpublishing keeps the counter, so the new generations are higher and the worker sees them
+        cs.unpublish_shared(prefix)
+        table.cases = table.cases * 3
+        assert cs.publish_shared(table, prefix) == 2
+        assert cs.publish_shared(table, prefix) == 3
+
+        parent.send('read')
+        assert parent.recv() == (3, 3 * total)
+    finally:
+        parent.send('stop')
+        worker.join()
+    assert worker.exitcode == 0
+
+
+
+def test_generation_continues_after_publisher_restart(prefix, context):
+    total = int(cs.read_table(DATA_PATH).cases.sum())
+
+    def publish(factor):
+        """
+        Runs a publisher process, reads the table it publishes, then lets it exit.
+        """
+        parent, child = context.Pipe()
+        publisher = context.Process(target=_publisher, args=(prefix, factor, child))
+        publisher.start()
+        generation = parent.recv()
+        table = shared.table()
+        result = (generation, shared.generation, int(table.cases.sum()), table.cases.flags.writeable)
+        del table
+        parent.send('stop')
+        publisher.join()
+        assert publisher.exitcode == 0
+        return result
+
+    # The counter must exist before a reader can attach to it
+    cs.publish_shared(cs.read_table(DATA_PATH), prefix)
+    cs.unpublish_shared(prefix)
+    shared = cs.SharedTable(prefix)
+
+    # Each new publisher process continues the count, and the attached reader swaps
+    assert publish(1) == (2, 2, total, False)
+    assert publish(2) == (3, 3, 2 * total, False)
+    shared.close()
+
+
+
+def _write_data(path, rows):
+    """
+    Writes a small coronavirus_data.csv with the given rows and returns its path.
+    """
+    lines = ['country,cases,deaths,region,population,latitude,longitude']
+    lines += [','.join(str(value) for value in row) for row in rows]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+
+def test_scenarios_match_hand_computation():
+    table = cs.read_table(DATA_PATH)
+    result = cs.scenarios([0.1, 0.4], [0.5, 3.0], [1.0, 1.5], table)
+    assert result.cases.shape == result.deaths.shape == (2, 2, 2, len(table))
+
+    # One grid point, country by country: population * f * min(cfr * m * a, 1)
+    f, m, a = 0.4, 3.0, 1.5
+    for row in range(len(table)):
+        population = int(table.population[row])
+        cfr = int(table.deaths[row]) / int(table.cases[row])
+        assert result.cases[1, 1, 1, row] == pytest.approx(population * f)
+        assert result.deaths[1, 1, 1, row] == pytest.approx(population * f * min(cfr * m * a, 1.0))
+
+    # Region roll-ups add up to the country totals
+    np.testing.assert_allclose(result.region_cases.sum(-1), result.cases.sum(-1))
+    np.testing.assert_allclose(result.region_deaths.sum(-1), result.deaths.sum(-1))
+
+    # Both results are regular, writable arrays
+    assert result.cases.flags.writeable and result.deaths.flags.writeable
+
+
+
+def test_scenarios_zero_cases_have_zero_fatality(tmp_path):
+    path = _write_data(tmp_path / 'data.csv', [['A', 100, 10, 'Europe', 1000, 0.0, 0.0],
+                                               ['B', 0, 0, 'Europe', 500, 0.0, 0.0]])
+    with np.errstate(all='raise'):
+        result = cs.scenarios([0.5], [2.0], 1.0, cs.read_table(path))
+    np.testing.assert_allclose(result.cases[0, 0, 0], [500, 250])
+    np.testing.assert_allclose(result.deaths[0, 0, 0], [500 * 0.1 * 2.0, 0.0])
+
+
+
+def test_scenarios_age_adjustment_per_region(tmp_path):
+    path = _write_data(tmp_path / 'data.csv', [['A', 100, 10, 'Europe', 1000, 0.0, 0.0],
+                                               ['B', 100, 10, 'Africa', 1000, 0.0, 0.0],
+                                               ['C', 100, 20, 'Australia/Oceania', 1000, 0.0, 0.0]])
+    table = cs.read_table(path)
+    # Regions are sorted: Africa, Australia/Oceania, Europe
+    result = cs.scenarios([1.0], [1.0], [[2.0, 10.0, 3.0]], table)
+    np.testing.assert_allclose(result.deaths[0, 0, 0], [1000 * 0.1 * 3.0, 1000 * 0.1 * 2.0, 1000.0])
+    assert result.regions == ('Africa', 'Australia-Oceania', 'Europe')
+    np.testing.assert_allclose(result.region_deaths[0, 0, 0], [200.0, 1000.0, 300.0])
+    np.testing.assert_allclose(result.region_cases[0, 0, 0], [1000.0, 1000.0, 1000.0])
+
+
+
+@pytest.mark.parametrize('arguments, message', [
+    (([[0.1, 0.2]], 1.0, 1.0), 'infection_fraction'),
+    ((0.1, [[1.0, 2.0]], 1.0), 'cfr_multiplier'),
+    ((0.1, 1.0, np.ones((1, 1, 6))), 'age_adjustment'),
+    ((0.1, 1.0, [[1.0, 2.0]]), 'one age adjustment per region'),
+])
+def test_scenarios_reject_invalid_grids(arguments, message):
+    with pytest.raises(ValueError, match=message):
+        cs.scenarios(*arguments, table=cs.read_table(DATA_PATH))